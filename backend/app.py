@@ -2,7 +2,7 @@ import streamlit as st
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.attributes import flag_modified
 
-from helpers.database import SessionLocal, engine
+from helpers.database import SessionLocal, engine, ensure_chat_session_version
 from model.models import Base, ChatSession
 from helpers.langchain_handler import create_rag_chain, convert_to_chat_history
 
@@ -10,6 +10,7 @@ import uuid
 
 # Make sure tables exist (same as in FastAPI)
 Base.metadata.create_all(bind=engine)
+ensure_chat_session_version()
 
 
 # ---------- Utility DB helpers ----------
@@ -79,8 +80,9 @@ def chat_with_session(session_id: str, user_input: str) -> str:
         )
 
         # Persist messages
-        session.messages.append({"role": "user", "message": user_input})
-        session.messages.append({"role": "assistant", "message": response})
+        session.version = (session.version or 0) + 1
+        session.messages.append({"role": "user", "message": user_input, "version": session.version})
+        session.messages.append({"role": "assistant", "message": response, "version": session.version})
 
         flag_modified(session, "messages")
         db.commit()
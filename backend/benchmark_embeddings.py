@@ -0,0 +1,129 @@
+"""
+Membandingkan backend embedding `huggingface` (PyTorch) dan `onnx` (int8):
+throughput, latency query, RSS, dan kecocokan hasil embedding (cosine similarity).
+
+Setiap backend dijalankan di proses terpisah supaya RSS-nya tidak tercampur.
+
+Contoh:
+    python benchmark_embeddings.py --min-cosine 0.99
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import psutil
+
+current_directory = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATASET = os.path.join(current_directory, "..", "RAGAS Evaluation", "SoftEng Evaluation Data Final 2.csv")
+DEFAULT_DOCUMENTS = os.path.join(current_directory, "documents")
+BACKENDS = ["huggingface", "onnx"]
+
+
+def load_texts(dataset_path, documents_path, max_passages):
+    questions = pd.read_csv(dataset_path, sep=";", encoding="utf-8-sig")["question"].tolist()
+    passages = []
+    for file in sorted(glob.glob(os.path.join(documents_path, "*.txt"))):
+        with open(file, "r", encoding="utf-8") as f:
+            passages += [p.strip() for p in f.read().split("\n\n") if p.strip()]
+    return questions, passages[:max_passages]
+
+
+def _run_backend(backend, model_name, questions, passages, num_threads, queue):
+    sys.path.insert(0, current_directory)
+    from helpers.document_retriever import DocumentRetriever
+
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+
+    start = time.perf_counter()
+    embeddings = DocumentRetriever._get_embeddings(model_name, backend, num_threads)
+    load_time = time.perf_counter() - start
+
+    # warmup
+    embeddings.embed_query(questions[0])
+
+    latencies = []
+    query_vectors = []
+    for question in questions:
+        start = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(question))
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    passage_vectors = embeddings.embed_documents(passages)
+    batch_time = time.perf_counter() - start
+
+    latencies = np.array(latencies)
+    queue.put({
+        "backend": backend,
+        "load_s": load_time,
+        "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "query_p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "passages_per_s": len(passages) / batch_time,
+        "rss_mb": process.memory_info().rss / 2**20,
+        "rss_model_mb": (process.memory_info().rss - rss_before) / 2**20,
+        "vectors": np.array(query_vectors + passage_vectors, dtype=np.float32),
+    })
+
+
+def run_backend(backend, model_name, questions, passages, num_threads):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run_backend, args=(backend, model_name, questions, passages, num_threads, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def cosine_parity(reference, candidate):
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    return (reference * candidate).sum(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend embedding huggingface vs onnx int8.")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    parser.add_argument("--documents", default=DEFAULT_DOCUMENTS)
+    parser.add_argument("--model-name", default="LazarusNLP/all-indo-e5-small-v4")
+    parser.add_argument("--max-passages", type=int, default=256)
+    parser.add_argument("--num-threads", type=int, default=None,
+                        help="Jumlah thread untuk kedua backend (default setengah core, sama dengan default onnx)")
+    parser.add_argument("--min-cosine", type=float, default=0.99,
+                        help="Batas minimal cosine similarity onnx vs huggingface per teks")
+    args = parser.parse_args()
+
+    # thread ditentukan sekali di sini supaya torch dan onnxruntime dibandingkan dengan jumlah core yang sama
+    num_threads = args.num_threads or max(1, (os.cpu_count() or 2) // 2)
+    print(f"Thread per backend: {num_threads}")
+
+    questions, passages = load_texts(args.dataset, args.documents, args.max_passages)
+    results = {b: run_backend(b, args.model_name, questions, passages, num_threads) for b in BACKENDS}
+
+    report = pd.DataFrame([{k: v for k, v in r.items() if k != "vectors"} for r in results.values()])
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+    cosine = cosine_parity(results["huggingface"]["vectors"], results["onnx"]["vectors"])
+    print(f"\nParity cosine: min={cosine.min():.4f} mean={cosine.mean():.4f} ({len(cosine)} teks)")
+
+    # urutan retrieval juga harus sama: bandingkan top-3 passage per pertanyaan
+    n = len(questions)
+    for backend in BACKENDS:
+        v = results[backend]["vectors"]
+        results[backend]["top"] = np.argsort(-(v[:n] @ v[n:].T), axis=1)[:, :3]
+    same_top = (results["huggingface"]["top"] == results["onnx"]["top"]).all(axis=1).mean()
+    print(f"Top-3 passage sama: {same_top:.2%}")
+
+    if cosine.min() < args.min_cosine:
+        print(f"GAGAL: cosine minimum di bawah {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
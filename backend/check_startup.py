@@ -0,0 +1,84 @@
+"""
+Profil waktu import `fast_api` (python -X importtime) untuk menangkap regresi startup.
+
+Gagal (exit 1) kalau import `fast_api` ikut memuat modul berat (langchain, torch,
+transformers, FAISS, ...) atau total waktu import melebihi --max-seconds.
+
+Contoh:
+    python check_startup.py --max-seconds 2 --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+current_directory = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = [
+    "langchain", "langchain_core", "langchain_community", "langchain_huggingface", "langchain_ollama",
+    "torch", "transformers", "sentence_transformers", "faiss", "onnxruntime",
+]
+
+MAX_IMPORT_SECONDS = 2.0
+
+_probe = (
+    "import json, sys, fast_api; "
+    f"heavy = {HEAVY_MODULES!r}; "
+    "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules} & set(heavy))))"
+)
+
+
+def profile_import():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _probe],
+        cwd=current_directory,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        raise SystemExit("Import fast_api gagal")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # format: "import time: <self us> | <cumulative us> | <indentasi><modul>"
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+
+    heavy_loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, heavy_loaded
+
+
+def total_seconds(timings):
+    # modul top-level (tanpa indentasi) dijumlahkan untuk total waktu import
+    return sum(cumulative for cumulative, _, name in timings if not name.startswith(" ")) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profil waktu import fast_api.")
+    parser.add_argument("--max-seconds", type=float, default=MAX_IMPORT_SECONDS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    timings, heavy_loaded = profile_import()
+    total = total_seconds(timings)
+
+    print(f"Total waktu import: {total:.3f}s")
+    print(f"{'cumulative (ms)':>16} {'self (ms)':>10}  module")
+    for cumulative, self_us, name in sorted(timings, reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:16.1f} {self_us / 1000:10.1f}  {name.strip()}")
+
+    failed = False
+    if heavy_loaded:
+        print(f"GAGAL: modul berat ikut ter-import: {', '.join(heavy_loaded)}")
+        failed = True
+    if total > args.max_seconds:
+        print(f"GAGAL: waktu import {total:.3f}s melebihi {args.max_seconds}s")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Evaluasi kualitas dan kecepatan retrieval secara offline (tanpa LLM / network)
+memakai dataset RAGAS di `RAGAS Evaluation/SoftEng Evaluation Data Final 2.csv`.
+
+Contoh:
+    python evaluate_retrieval.py --chunk-size 300 500 --k 5 --search-type similarity mmr
+
+Metrik per konfigurasi:
+    - recall@1..k  : pertanyaan yang dokumen sumbernya (`file_name`) muncul di top-i
+    - MRR          : rata-rata 1/rank dokumen sumber pertama
+    - context_overlap : proporsi token `context_1..3` yang tercakup di chunk hasil retrieval
+    - latency      : latency embed_query + search per pertanyaan, diukur berurutan (p50 / p95 / mean, ms)
+    - throughput   : pertanyaan per detik saat embed dibatch dan dijalankan paralel
+"""
+import argparse
+import itertools
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from helpers.document_retriever import DocumentRetriever
+
+current_directory = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATASET = os.path.join(current_directory, "..", "RAGAS Evaluation", "SoftEng Evaluation Data Final 2.csv")
+DEFAULT_DOCUMENTS = os.path.join(current_directory, "documents")
+CONTEXT_COLUMNS = ["context_1", "context_2", "context_3"]
+
+_token_pattern = re.compile(r"\w+")
+
+
+def load_dataset(path):
+    df = pd.read_csv(path, sep=";", encoding="utf-8-sig")
+    df[CONTEXT_COLUMNS] = df[CONTEXT_COLUMNS].fillna("")
+    return df
+
+
+def _stem(file_name):
+    return os.path.splitext(os.path.basename(file_name))[0].lower()
+
+
+def _is_relevant(source, expected):
+    # beberapa file_name di dataset versi lebih pendek dari nama file sebenarnya
+    source, expected = _stem(source), _stem(expected)
+    return source == expected or source.startswith(expected + "_")
+
+
+def _tokens(text):
+    return set(_token_pattern.findall(text.lower()))
+
+
+def _search(docs_retriever: DocumentRetriever, vector):
+    if docs_retriever.search_type == "mmr":
+        return docs_retriever.vector_store.max_marginal_relevance_search_by_vector(vector, k=docs_retriever.k)
+    return docs_retriever.vector_store.similarity_search_by_vector(vector, k=docs_retriever.k)
+
+
+def measure_latency(docs_retriever: DocumentRetriever, questions):
+    """
+    Satu pertanyaan per waktu (embed_query + search), seperti jalur request di aplikasi.
+    """
+    results, latencies = [], []
+    for question in questions:
+        start = time.perf_counter()
+        docs = _search(docs_retriever, docs_retriever.embeddings.embed_query(question))
+        latencies.append(time.perf_counter() - start)
+        results.append(docs)
+    return results, np.array(latencies)
+
+
+def measure_throughput(docs_retriever: DocumentRetriever, questions, batch_size=8, workers=4):
+    """
+    Embed per batch di thread pool lalu search; mengembalikan wall time seluruh pertanyaan.
+    """
+    def run_batch(batch):
+        vectors = docs_retriever.embeddings.embed_documents(batch)
+        return [_search(docs_retriever, vector) for vector in vectors]
+
+    batches = [questions[i:i + batch_size] for i in range(0, len(questions), batch_size)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(run_batch, batches))
+    return time.perf_counter() - start
+
+
+def compute_metrics(df, results, k):
+    # hits[i, j] = True kalau hasil ke-j pertanyaan ke-i berasal dari dokumen sumbernya
+    hits = np.zeros((len(df), k), dtype=bool)
+    for i, (expected, docs) in enumerate(zip(df["file_name"], results)):
+        for j, doc in enumerate(docs[:k]):
+            hits[i, j] = _is_relevant(doc.metadata.get("source", ""), expected)
+
+    recall_at = hits.cumsum(axis=1).astype(bool).mean(axis=0)
+    found = hits.any(axis=1)
+    first_rank = hits.argmax(axis=1) + 1
+    mrr = np.where(found, 1.0 / first_rank, 0.0).mean()
+
+    overlaps = np.full((len(df), len(CONTEXT_COLUMNS)), np.nan)
+    for i, docs in enumerate(results):
+        retrieved = _tokens(" ".join(doc.page_content for doc in docs[:k]))
+        for j, column in enumerate(CONTEXT_COLUMNS):
+            context = _tokens(df[column].iat[i])
+            if context:
+                overlaps[i, j] = len(context & retrieved) / len(context)
+
+    metrics = {f"recall@{i + 1}": float(recall_at[i]) for i in range(k)}
+    metrics["mrr"] = float(mrr)
+    metrics["context_overlap"] = float(np.nanmean(overlaps))
+    return metrics
+
+
+def evaluate_config(df, docs_retriever: DocumentRetriever, k, search_type, batch_size, workers):
+    docs_retriever.k = k
+    docs_retriever.search_type = search_type
+
+    questions = df["question"].tolist()
+    # warmup supaya latency pertanyaan pertama tidak ikut menghitung inisialisasi
+    _search(docs_retriever, docs_retriever.embeddings.embed_query(questions[0]))
+    results, latencies = measure_latency(docs_retriever, questions)
+    wall_time = measure_throughput(docs_retriever, questions, batch_size=batch_size, workers=workers)
+
+    metrics = compute_metrics(df, results, k)
+    metrics.update({
+        "chunk_size": docs_retriever.chunk_size,
+        "chunk_overlap": docs_retriever.chunk_overlap,
+        "k": k,
+        "search_type": search_type,
+        "latency_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "latency_p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "latency_mean_ms": float(latencies.mean() * 1000),
+        "batch_wall_time_s": wall_time,
+        "throughput_qps": len(questions) / wall_time,
+    })
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluasi retrieval offline dengan dataset RAGAS.")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    parser.add_argument("--documents", default=DEFAULT_DOCUMENTS)
+    parser.add_argument("--model-name", default="LazarusNLP/all-indo-e5-small-v4")
+    parser.add_argument("--chunk-size", type=int, nargs="+", default=[500])
+    parser.add_argument("--chunk-overlap", type=int, nargs="+", default=[100])
+    parser.add_argument("--k", type=int, nargs="+", default=[3])
+    parser.add_argument("--search-type", nargs="+", default=["similarity"], choices=["similarity", "mmr"])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output", help="Simpan hasil ke file CSV")
+    args = parser.parse_args()
+
+    df = load_dataset(args.dataset)
+    embeddings = HuggingFaceEmbeddings(model_name=args.model_name)
+
+    rows = []
+    for chunk_size, chunk_overlap in itertools.product(args.chunk_size, args.chunk_overlap):
+        if chunk_overlap >= chunk_size:
+            continue
+        # index cukup dibangun sekali per konfigurasi chunking
+        docs_retriever = DocumentRetriever(
+            db_path=None,
+            db_session=None,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            embeddings=embeddings,
+        )
+        docs_retriever.build_vectorstore_in_memory(args.documents)
+
+        for k, search_type in itertools.product(args.k, args.search_type):
+            rows.append(evaluate_config(df, docs_retriever, k, search_type, args.batch_size, args.workers))
+
+    report = pd.DataFrame(rows)
+    leading = ["chunk_size", "chunk_overlap", "k", "search_type"]
+    report = report[leading + [c for c in report.columns if c not in leading]]
+    print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    if args.output:
+        report.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
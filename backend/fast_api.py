@@ -1,18 +1,22 @@
-from fastapi import FastAPI, Depends, HTTPException, Body
+from fastapi import FastAPI, Depends, HTTPException, Body, Header, Response
+from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.attributes import flag_modified
-from helpers.database import SessionLocal, engine, get_db
+from helpers.database import SessionLocal, engine, get_db, ensure_chat_session_version
 from model.models import Base, ChatSession
 from schemas.schemas import (
-    ChatRequest, SessionHistory,
+    ChatRequest, ChatTurnResponse, SessionHistory,
     SessionSummary, CreateSessionRequest, CreateSessionResponse,
     Token, TokenData
 )
-from typing import List
-from helpers.langchain_handler import create_rag_chain, convert_to_chat_history
+from typing import List, Optional
+from helpers.langchain_handler import create_rag_chain, convert_to_chat_history, ensure_directories, loaded_components, warmup
 import uuid
 import os
+import threading
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
@@ -23,6 +27,9 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-change-me")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# RAG_WARMUP: langkah warmup saat startup, dipisah koma (embed,search,generate); kosong = tanpa warmup
+RAG_WARMUP = [step.strip() for step in os.environ.get("RAG_WARMUP", "embed,search,generate").split(",") if step.strip()]
+
 pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
 
@@ -74,9 +81,35 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise credentials_exception
     return user
 
-Base.metadata.create_all(bind=engine)
+startup_state = {"tables": False, "warmup": "pending", "warmup_error": None}
+
+def run_warmup():
+    db = SessionLocal()
+    try:
+        warmup(db, RAG_WARMUP)
+        startup_state["warmup"] = "done"
+    except Exception as e:
+        print(f"Warmup gagal: {e}")
+        startup_state["warmup"] = "failed"
+        startup_state["warmup_error"] = str(e)
+    finally:
+        db.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    Base.metadata.create_all(bind=engine)
+    ensure_chat_session_version()
+    ensure_directories()
+    startup_state["tables"] = True
+
+    # warmup jalan di background supaya /healthz tetap bisa dijawab selama model dimuat
+    if RAG_WARMUP:
+        threading.Thread(target=run_warmup, daemon=True).start()
+    else:
+        startup_state["warmup"] = "skipped"
+    yield
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 # uvicorn fast_api:app --reload
 app.add_middleware(
     CORSMiddleware,
@@ -84,7 +117,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+def session_etag(session: ChatSession) -> str:
+    return f'W/"{session.version or 0}"'
+
+def changed_since(messages, since: int) -> int:
+    """
+    Index pesan pertama yang ditulis setelah versi `since`. Penulisan hanya
+    menambah di akhir atau mengganti ekor riwayat (edit_last), jadi "version"
+    per pesan tidak pernah turun dan cukup dicari dari belakang.
+    """
+    start = len(messages)
+    while start > 0 and messages[start - 1].get("version", 0) > since:
+        start -= 1
+    return start
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok", "components": loaded_components()}
+
+@app.get("/readyz")
+def readyz():
+    components = loaded_components()
+    warmed = startup_state["warmup"] in ("done", "skipped")
+    # warmup yang gagal tidak membuat 503 selamanya: kalau request berikutnya
+    # berhasil membuat RAG chain, semua komponen sudah termuat
+    if startup_state["warmup"] == "failed" and all(components.values()):
+        warmed = True
+    ready = startup_state["tables"] and warmed
+    body = {
+        "status": "ready" if ready else "not ready",
+        "warmup": startup_state["warmup"],
+        "warmup_error": startup_state["warmup_error"],
+        "components": components,
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
 
 @app.post("/session", response_model=CreateSessionResponse)
 def create_session(req: CreateSessionRequest, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -106,7 +176,7 @@ def create_session(req: CreateSessionRequest, db: Session = Depends(get_db), cur
         topic=req.topic
     )
 
-@app.post("/chat/{session_id}")
+@app.post("/chat/{session_id}", response_model=ChatTurnResponse)
 def chat(session_id: str, req: ChatRequest, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     session = db.query(ChatSession).filter(ChatSession.session_id == session_id).first()
     if not session:
@@ -123,29 +193,59 @@ def chat(session_id: str, req: ChatRequest, db: Session = Depends(get_db), curre
         session_id=session_id
     )
 
-    session.messages.append({"role": "user", "message": req.user_input})
-    session.messages.append({"role": "assistant", "message": response})
+    session.version = (session.version or 0) + 1
+    start = len(session.messages)
+    new_turn = [
+        {"role": "user", "message": req.user_input, "version": session.version},
+        {"role": "assistant", "message": response, "version": session.version},
+    ]
+    session.messages.extend(new_turn)
     flag_modified(session, "messages")
     db.commit()
-    db.refresh(session)
     return {
-    "session_id": str(session.session_id),
-    "topic": session.topic,
-    "messages": session.messages
-}
+        "session_id": session_id,
+        "seq": session.version,
+        "start": start,
+        "messages": new_turn
+    }
 
 
 @app.get("/history/{session_id}", response_model=SessionHistory)
-def get_history(session_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def get_history(
+    session_id: str,
+    response: Response,
+    since: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    GET /history/{session_id}?since=<seq>
+    since: seq terakhir yang dimiliki client; hanya pesan yang berubah setelahnya
+    yang dikirim, mulai dari index `start`. Default seluruh riwayat.
+    Mendukung If-None-Match -> 304 kalau sesi belum berubah.
+    """
     session = db.query(ChatSession).filter(ChatSession.session_id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found.")
     if session.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not permitted to access this session.")
+
+    etag = session_etag(session)
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    messages = session.messages or []
+    version = session.version or 0
+    # since di luar jangkauan (seq tidak dikenal) -> kirim ulang seluruh riwayat
+    start = changed_since(messages, since) if since is not None and 0 <= since <= version else 0
+    response.headers["ETag"] = etag
     return {
         "session_id": str(session.session_id),
         "topic": session.topic,
-        "messages": session.messages or []
+        "seq": version,
+        "start": start,
+        "messages": messages[start:]
     }
 
 @app.get("/sessions", response_model=List[SessionSummary])
@@ -155,7 +255,7 @@ def get_sessions(db: Session = Depends(get_db), current_user: User = Depends(get
         {"session_id": str(s.session_id), "topic": s.topic} for s in sessions
     ]
 
-@app.post("/chat/{session_id}/edit_last")
+@app.post("/chat/{session_id}/edit_last", response_model=ChatTurnResponse)
 def edit_last_message(session_id: str, req: ChatRequest = Body(...), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
     session = db.query(ChatSession).filter(ChatSession.session_id == session_id).first()
     if not session:
@@ -172,7 +272,8 @@ def edit_last_message(session_id: str, req: ChatRequest = Body(...), db: Session
             break
     if last_user_idx is None:
         raise HTTPException(status_code=400, detail="No user message found to edit.")
-    msgs[last_user_idx]["message"] = req.user_input
+    session.version = (session.version or 0) + 1
+    msgs[last_user_idx] = {"role": "user", "message": req.user_input, "version": session.version}
     trimmed = msgs[: last_user_idx + 1]
     history = convert_to_chat_history(trimmed)
     rag_chain = create_rag_chain(db_session=db)
@@ -181,12 +282,16 @@ def edit_last_message(session_id: str, req: ChatRequest = Body(...), db: Session
         chat_history=history,
         session_id=session_id
     )
-    trimmed.append({"role": "assistant", "message": new_response})
+    trimmed.append({"role": "assistant", "message": new_response, "version": session.version})
     session.messages = trimmed
     flag_modified(session, "messages")
     db.commit()
-    db.refresh(session)
-    return {"messages": session.messages}
+    return {
+        "session_id": session_id,
+        "seq": session.version,
+        "start": last_user_idx,
+        "messages": trimmed[last_user_idx:]
+    }
 
 @app.delete("/session/{session_id}")
 def delete_session(session_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -1,7 +1,6 @@
 from sqlalchemy import create_engine, select, String
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from model.models import ProcessedFile
@@ -10,14 +9,34 @@ import os
 import json
 
 class DocumentRetriever:
-    def __init__(self, db_path, db_session: Session, model_name="LazarusNLP/all-indo-e5-small-v4", k=3):
-        self.embeddings = HuggingFaceEmbeddings(model_name=model_name)
+    def __init__(self, db_path, db_session: Session, model_name="LazarusNLP/all-indo-e5-small-v4", k=3,
+                 chunk_size=500, chunk_overlap=100, search_type="similarity", embeddings=None,
+                 embedding_backend="huggingface", embedding_threads=None):
+        self.embeddings = embeddings or self._get_embeddings(model_name, embedding_backend, embedding_threads)
         self.k = k
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.search_type = search_type
         self.db_path = db_path
         self.db_session = db_session
         self.vector_store = None
         self.retriever = None
     
+    @staticmethod
+    def _get_embeddings(model_name, backend, num_threads=None):
+        # import di dalam fungsi supaya backend onnx tidak ikut memuat torch
+        if backend == "huggingface":
+            if num_threads:
+                import torch
+                torch.set_num_threads(num_threads)
+            from langchain_huggingface import HuggingFaceEmbeddings
+            return HuggingFaceEmbeddings(model_name=model_name)
+        elif backend == "onnx":
+            from helpers.onnx_embeddings import OnnxEmbeddings
+            return OnnxEmbeddings(model_name=model_name, num_threads=num_threads)
+        else:
+            raise ValueError(f"Unsupported embedding backend {backend}")
+
     def _load_docs_by_type(self, file_path):
         ext = os.path.splitext(file_path)[1].lower()
 
@@ -53,7 +72,7 @@ class DocumentRetriever:
         return docs
     
     def _split_docs(self, docs: list[Document]):
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size = 500, chunk_overlap=100, length_function=len, is_separator_regex=False)
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, length_function=len, is_separator_regex=False)
         all_chunks = []
         for doc in docs:
             chunks = text_splitter.split_text(doc.page_content)
@@ -103,26 +122,51 @@ class DocumentRetriever:
             self._add_processed_file(source)
         
         added = 0
-        if os.path.exists(os.path.join(self.db_path, "index.faiss")):
+        if self.vector_store is not None:
+            # vectorstore sudah ada di memori (dipakai ulang antar request), cukup tambah chunk baru
+            added = len(new_chunks)
+            if new_chunks:
+                print(f"Menambahkan {added} chunks baru ke vectorstore...")
+                self.vector_store.add_documents(new_chunks)
+                self.vector_store.save_local(self.db_path)
+            print(f"Vectorstore siap. {added} chunks baru ditambahkan.")
+            return
+        elif os.path.exists(os.path.join(self.db_path, "index.faiss")):
             print("Load vectorstore dari lokal...")
             self.vector_store = FAISS.load_local(self.db_path, self.embeddings, allow_dangerous_deserialization=True)
             added = len(new_chunks)
             if (new_chunks):
                 print(f"Menambahkan {added} chunks baru ke vectorstore...")
                 self.vector_store.add_documents(new_chunks)
+                self.vector_store.save_local(self.db_path)
         else:
             print("Membuat vectorstore baru...")
             self.vector_store = FAISS.from_documents(documents=new_chunks, embedding=self.embeddings)
             added = len(new_chunks)
             self.vector_store.save_local(self.db_path)
 
+        self._setup_retriever()
+
+        print(f"Vectorstore siap. {added} chunks baru ditambahkan.")
+
+    def build_vectorstore_in_memory(self, folder_path):
+        """
+        Membuat vectorstore baru di memori dari semua dokumen di folder,
+        tanpa membaca/menulis ke database maupun ke db_path.
+        Dipakai untuk evaluasi berbagai konfigurasi chunking.
+        """
+        documents = self.load_docs_from_folder(folder_path=folder_path)
+        chunks = self._split_docs(documents)
+        self.vector_store = FAISS.from_documents(documents=chunks, embedding=self.embeddings)
+        self._setup_retriever()
+        print(f"Vectorstore in-memory siap. {len(chunks)} chunks.")
+
+    def _setup_retriever(self):
         self.retriever = self.vector_store.as_retriever(
-            search_type="similarity",
+            search_type=self.search_type,
             search_kwargs={"k": self.k}
         )
 
-        print(f"Vectorstore siap. {added} chunks baru ditambahkan.")
-
     def get_retriever(self):
         return self.retriever
 
@@ -1,40 +1,251 @@
 import os
 import json
+import threading
+import weakref
+from collections import OrderedDict
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_community.chat_message_histories import ChatMessageHistory
 
 class HistoryHandler:
-    def __init__(self, sessions_path):
-        self.store = {}
+    """
+    Menyimpan riwayat chat per sesi di file JSON-lines (satu pesan per baris).
+
+    - Cache di memori dibatasi `max_sessions` (LRU), sesi yang paling lama
+      tidak dipakai akan disimpan lalu dikeluarkan dari cache. Kalau objek
+      history-nya masih dipegang pemanggil lalu di-save lagi, sesi itu
+      dimasukkan kembali ke cache.
+    - Setiap save hanya menambahkan pesan baru ke akhir file (append-only).
+      Kalau riwayat berubah di tengah (misal pesan terakhir diedit), yang
+      ditulis adalah record `{"op": "truncate", "length": n}` lalu pesan
+      setelahnya.
+      File ditulis ulang (compaction) kalau jumlah baris yang sudah tidak
+      terpakai lebih dari `compact_every`.
+    - fsync dilakukan per batch, setiap `fsync_every` penulisan, atau saat
+      `flush()` / `close()` dipanggil.
+    """
+
+    def __init__(self, sessions_path, max_sessions=128, compact_every=200, fsync_every=16):
+        self.store = OrderedDict()
         self.session_path = sessions_path
+        self.max_sessions = max_sessions
+        self.compact_every = compact_every
+        self.fsync_every = fsync_every
+        # record yang sudah tersimpan (None = masih format lama) dan jumlah baris log per sesi
+        self._persisted = {}
+        self._log_lines = {}
+        # history yang sudah dikeluarkan dari cache tapi masih dipegang pemanggil
+        self._evicted = weakref.WeakValueDictionary()
+        self._dirty_files = set()
+        self._unsynced_writes = 0
+        self._lock = threading.RLock()
+
+    def _log_file(self, session_id: str) -> str:
+        return os.path.join(self.session_path, f"{session_id}.jsonl")
+
+    def _legacy_file(self, session_id: str) -> str:
+        return os.path.join(self.session_path, f"{session_id}.json")
+
+    @staticmethod
+    def _to_record(message):
+        if isinstance(message, HumanMessage):
+            return {"role": "human", "content": message.content}
+        elif isinstance(message, AIMessage):
+            return {"role": "ai", "content": message.content}
+        return None
+
+    @staticmethod
+    def _add_record(history: ChatMessageHistory, record):
+        if record['role'] == 'human':
+            history.add_user_message(record['content'])
+        elif record['role'] == 'ai':
+            history.add_ai_message(record['content'])
+
+    def _read_log(self, session_id: str):
+        """
+        Membaca file log dan mengembalikan (records, jumlah baris).
+        Baris rusak di akhir file (proses mati sebelum fsync) dipotong kembali
+        ke byte terakhir yang valid supaya append berikutnya tidak menempel ke
+        baris yang rusak. Baris rusak di tengah hanya dilewati, file tidak diubah.
+        """
+        log_file = self._log_file(session_id)
+        records = []
+        lines = 0
+        offset = 0
+        good_offset = 0
+        needs_newline = False
+        # baris rusak sejak record valid terakhir; kalau diikuti record valid berarti bukan ekor yang terpotong
+        bad_lines = []
+
+        with open(log_file, "rb") as f:
+            for number, raw in enumerate(f, start=1):
+                offset += len(raw)
+                if not raw.strip():
+                    if not bad_lines:
+                        good_offset = offset
+                    continue
+                try:
+                    record = json.loads(raw)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    bad_lines.append(number)
+                    continue
+                if bad_lines:
+                    print(f"Baris rusak di {log_file} dilewati: {bad_lines}")
+                    lines += len(bad_lines)
+                    bad_lines = []
+                lines += 1
+                good_offset = offset
+                needs_newline = not raw.endswith(b"\n")
+                if record.get('op') == 'truncate':
+                    del records[record['length']:]
+                else:
+                    records.append(record)
+
+        if bad_lines:
+            print(f"Baris rusak di akhir {log_file}, file dipotong ke byte {good_offset}")
+        if good_offset < os.path.getsize(log_file):
+            with open(log_file, "r+b") as f:
+                f.truncate(good_offset)
+                os.fsync(f.fileno())
+        if needs_newline:
+            # record terakhir valid tapi belum ada newline-nya
+            with open(log_file, "ab") as f:
+                f.write(b"\n")
+
+        return records, lines
+
+    def _load_records(self, session_id: str):
+        """
+        Mengisi status tersimpan sebuah sesi dari disk dan mengembalikan record-nya.
+        """
+        if os.path.exists(self._log_file(session_id)):
+            records, lines = self._read_log(session_id)
+            self._persisted[session_id] = list(records)
+        elif os.path.exists(self._legacy_file(session_id)):
+            # format lama: satu array JSON per sesi, dikonversi saat save berikutnya
+            with open(self._legacy_file(session_id), "r", encoding="utf-8") as f:
+                records = json.load(f)
+            lines = 0
+            self._persisted[session_id] = None
+        else:
+            records, lines = [], 0
+            self._persisted[session_id] = []
+
+        self._log_lines[session_id] = lines
+        return records
+
+    def _evict_if_needed(self):
+        while len(self.store) > self.max_sessions:
+            session_id = next(iter(self.store))
+            self.save_session_history(session_id)
+            self._evicted[session_id] = self.store.pop(session_id)
+            self._persisted.pop(session_id, None)
+            self._log_lines.pop(session_id, None)
+
+    def _admit(self, session_id: str, history: ChatMessageHistory):
+        self.store[session_id] = history
+        self._evicted.pop(session_id, None)
+        self._evict_if_needed()
 
     def get_session_history(self, session_id: str) -> BaseChatMessageHistory:
-        if session_id not in self.store:
-            history_file = os.path.join(self.session_path, f"{session_id}.json")
-            if os.path.exists(history_file):
-                with open(history_file, "r") as f:
-                    messages = json.load(f)
-                    history = ChatMessageHistory()
-                    for msg in messages:
-                        if msg['role'] == 'human':
-                            history.add_user_message(msg['content'])
-                        elif msg['role'] == 'ai':
-                            history.add_ai_message(msg['content'])
-                    self.store[session_id] = history
+        with self._lock:
+            if session_id in self.store:
+                self.store.move_to_end(session_id)
+                return self.store[session_id]
+
+            history = self._evicted.get(session_id)
+            if history is not None:
+                # objek lama masih dipakai pemanggil, jangan dibuat salinan baru
+                self._load_records(session_id)
             else:
-                self.store[session_id] = ChatMessageHistory()
-        return self.store[session_id]
-    
+                history = ChatMessageHistory()
+                for record in self._load_records(session_id):
+                    self._add_record(history, record)
+            self._admit(session_id, history)
+            return history
+
+    def _compact(self, session_id: str, records):
+        log_file = self._log_file(session_id)
+        tmp_file = f"{log_file}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, log_file)
+        self._dirty_files.discard(log_file)
+
+        legacy_file = self._legacy_file(session_id)
+        if os.path.exists(legacy_file):
+            os.remove(legacy_file)
+
+        self._log_lines[session_id] = len(records)
+
+    def _append(self, session_id: str, records):
+        log_file = self._log_file(session_id)
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        self._dirty_files.add(log_file)
+        self._log_lines[session_id] += len(records)
+
+        self._unsynced_writes += 1
+        if self._unsynced_writes >= self.fsync_every:
+            self.flush()
+
     def save_session_history(self, session_id: str):
-        if session_id in self.store:
-            history = self.store[session_id]
-            messages = []
-            for message in history.messages:
-                if isinstance(message, HumanMessage):
-                    messages.append({"role": "human", "content": message.content})
-                elif isinstance(message, AIMessage):
-                    messages.append({"role": "ai", "content": message.content})
-            history_file = os.path.join(self.session_path, f"{session_id}.json")
-            with open(history_file, "w") as f:
-                json.dump(messages, f, indent=2)
\ No newline at end of file
+        with self._lock:
+            if session_id in self.store:
+                history = self.store[session_id]
+            else:
+                history = self._evicted.get(session_id)
+                if history is None:
+                    # tidak ada di cache dan tidak dipegang siapa pun:
+                    # semua isinya sudah disimpan saat dikeluarkan dari cache
+                    return
+                self._load_records(session_id)
+                self._admit(session_id, history)
+
+            records = [r for r in (self._to_record(m) for m in history.messages) if r is not None]
+            persisted = self._persisted.get(session_id, [])
+
+            if persisted is None:
+                # format lama, tulis ulang sebagai JSON-lines
+                self._compact(session_id, records)
+            else:
+                # cari posisi pertama yang berbeda dari yang sudah tersimpan,
+                # dibandingkan per isi supaya edit in-place juga tersimpan
+                common = 0
+                limit = min(len(records), len(persisted))
+                while common < limit and records[common] == persisted[common]:
+                    common += 1
+
+                changes = []
+                if common < len(persisted):
+                    changes.append({"op": "truncate", "length": common})
+                changes.extend(records[common:])
+                if changes:
+                    self._append(session_id, changes)
+
+                if self._log_lines[session_id] - len(records) > self.compact_every:
+                    self._compact(session_id, records)
+
+            self._persisted[session_id] = records
+
+    def flush(self):
+        """
+        fsync semua file log yang masih punya penulisan yang belum di-sync.
+        """
+        with self._lock:
+            for log_file in self._dirty_files:
+                if not os.path.exists(log_file):
+                    continue
+                with open(log_file, "rb") as f:
+                    os.fsync(f.fileno())
+            self._dirty_files.clear()
+            self._unsynced_writes = 0
+
+    def close(self):
+        with self._lock:
+            for session_id in list(self.store):
+                self.save_session_history(session_id)
+            self.flush()
@@ -1,22 +1,74 @@
-from helpers.document_retriever import DocumentRetriever
-from helpers.rag_chain import SimpleRAGChain
-from helpers.database import get_db
-from langchain_community.chat_message_histories import ChatMessageHistory
-from typing import List, Dict
+from typing import List, Dict, TYPE_CHECKING
 import os
+import threading
 from sqlalchemy.orm import Session
 
+# langchain, torch, transformers dan FAISS baru di-import saat pertama kali dipakai
+# supaya import modul ini (dan fast_api) tetap ringan
+if TYPE_CHECKING:
+    from helpers.rag_chain import SimpleRAGChain
+    from langchain_community.chat_message_histories import ChatMessageHistory
+
 # Setup retriever dan chain global
 current_directory = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 db_path = os.path.join(current_directory, "vector_db")
 folder_path = os.path.join(current_directory, "documents")
 metadata_path = os.path.join(current_directory, "metadata")
 
-os.makedirs(db_path, exist_ok=True)
-os.makedirs(folder_path, exist_ok=True)
-os.makedirs(metadata_path, exist_ok=True)
+# RAG_PIPELINED=1 -> retrieval spekulatif paralel dengan pembuatan pertanyaan mandiri
+rag_pipelined = os.environ.get("RAG_PIPELINED", "0") == "1"
+# RAG_PROMPT_LAYOUT=prefix_cache -> konteks ditaruh setelah riwayat agar prefix prompt stabil
+rag_prompt_layout = os.environ.get("RAG_PROMPT_LAYOUT", "context_in_system")
+
+# RAG_EMBEDDING_BACKEND=onnx -> embedding int8 di onnxruntime, tanpa torch
+rag_embedding_backend = os.environ.get("RAG_EMBEDDING_BACKEND", "huggingface")
+embedding_model_name = "LazarusNLP/all-indo-e5-small-v4"
+# RAG_EMBEDDING_THREADS: jumlah thread CPU untuk model embedding (default: setengah core untuk onnx)
+embedding_threads = int(os.environ["RAG_EMBEDDING_THREADS"]) if os.environ.get("RAG_EMBEDDING_THREADS") else None
+
+# hanya opsi yang env var-nya di-set yang menimpa DEFAULT_OLLAMA_OPTIONS di rag_chain
+ollama_options = {}
+if os.environ.get("OLLAMA_NUM_CTX"):
+    ollama_options["num_ctx"] = int(os.environ["OLLAMA_NUM_CTX"])
+if os.environ.get("OLLAMA_KEEP_ALIVE"):
+    ollama_options["keep_alive"] = os.environ["OLLAMA_KEEP_ALIVE"]
+if os.environ.get("OLLAMA_NUM_THREAD"):
+    ollama_options["num_thread"] = int(os.environ["OLLAMA_NUM_THREAD"])
 
-db_session = get_db()
+# komponen yang sudah dimuat, dipakai ulang antar request dan dilaporkan di /readyz
+components = {
+    "embeddings": None,
+    "docs_retriever": None,
+    "rag_chain": None,
+}
+_embeddings_lock = threading.Lock()
+_chain_lock = threading.Lock()
+
+def ensure_directories():
+    os.makedirs(db_path, exist_ok=True)
+    os.makedirs(folder_path, exist_ok=True)
+    os.makedirs(metadata_path, exist_ok=True)
+
+def get_embeddings():
+    """
+    Model embedding dimuat sekali per proses lalu dipakai ulang.
+    """
+    with _embeddings_lock:
+        if components["embeddings"] is None:
+            from helpers.document_retriever import DocumentRetriever
+            components["embeddings"] = DocumentRetriever._get_embeddings(
+                embedding_model_name, rag_embedding_backend, embedding_threads
+            )
+        return components["embeddings"]
+
+def loaded_components() -> Dict[str, bool]:
+    docs_retriever = components["docs_retriever"]
+    rag_chain = components["rag_chain"]
+    return {
+        "embeddings": components["embeddings"] is not None,
+        "vector_store": docs_retriever is not None and docs_retriever.vector_store is not None,
+        "llm": rag_chain is not None and rag_chain.llm is not None,
+    }
 
 # docs_retriever = DocumentRetriever(db_path=db_path, db_session=db_session)
 # docs_retriever.init_or_update_vectorstore(folder_path=folder_path)
@@ -24,26 +76,59 @@ db_session = get_db()
 
 # rag_chain = SimpleRAGChain(retriever=retriever)
 
-def create_rag_chain(db_session: Session) -> SimpleRAGChain:
+def create_rag_chain(db_session: Session) -> "SimpleRAGChain":
     """
     Fungsi ini membuat dan menginisialisasi semua yang dibutuhkan
     untuk RAG chain, dan menerima sesi database yang aktif.
+    Retriever (beserta vectorstore di memori) dan chain dibuat sekali per proses;
+    request berikutnya hanya mengecek dokumen baru lalu memakai chain yang sama.
+    """
+    from helpers.document_retriever import DocumentRetriever
+    from helpers.rag_chain import SimpleRAGChain
+
+    ensure_directories()
+
+    with _chain_lock:
+        # 1. Inisialisasi retriever sekali, sesi database diganti per request
+        if components["docs_retriever"] is None:
+            components["docs_retriever"] = DocumentRetriever(
+                db_path=db_path, db_session=db_session, embeddings=get_embeddings()
+            )
+        docs_retriever = components["docs_retriever"]
+        docs_retriever.db_session = db_session
+
+        # 2. Lakukan update vector store (load dari disk hanya saat pertama kali)
+        docs_retriever.init_or_update_vectorstore(folder_path=folder_path)
+
+        # 3. Buat RAG chain sekali dengan retriever dari vectorstore yang sama
+        if components["rag_chain"] is None:
+            components["rag_chain"] = SimpleRAGChain(
+                retriever=docs_retriever.get_retriever(),
+                pipelined=rag_pipelined,
+                ollama_options=ollama_options,
+                prompt_layout=rag_prompt_layout,
+            )
+
+        return components["rag_chain"]
+
+def warmup(db_session: Session, steps: List[str]):
+    """
+    Memanaskan komponen sebelum request pertama.
+    steps: kombinasi "embed", "search", "generate".
     """
-    # 1. Inisialisasi retriever di DALAM FUNGSI
-    docs_retriever = DocumentRetriever(db_path=db_path, db_session=db_session)
-    
-    # 2. Lakukan update vector store
-    docs_retriever.init_or_update_vectorstore(folder_path=folder_path)
-    
-    # 3. Dapatkan retriever object
-    retriever = docs_retriever.get_retriever()
-    
-    # 4. Buat RAG chain
-    rag_chain = SimpleRAGChain(retriever=retriever)
-    
-    return rag_chain
-
-def convert_to_chat_history(messages: List[Dict[str, str]]) -> ChatMessageHistory:
+    if "embed" in steps:
+        get_embeddings().embed_query("warmup")
+    if "search" in steps or "generate" in steps:
+        rag_chain = create_rag_chain(db_session=db_session)
+        if "search" in steps:
+            rag_chain.retriever.invoke("warmup")
+        if "generate" in steps and rag_chain.llm is not None:
+            # generasi pendek supaya model termuat di server Ollama (ditahan oleh keep_alive)
+            rag_chain.llm.model_copy(update={"num_predict": 1}).invoke("Halo")
+
+def convert_to_chat_history(messages: List[Dict[str, str]]) -> "ChatMessageHistory":
+    from langchain_community.chat_message_histories import ChatMessageHistory
+
     history = ChatMessageHistory()
     for msg in messages:
         if msg["role"] == "user":
@@ -0,0 +1,117 @@
+import json
+import os
+
+import numpy as np
+import onnxruntime as ort
+from langchain_core.embeddings import Embeddings
+from tokenizers import Tokenizer
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Pengganti HuggingFaceEmbeddings yang berjalan di onnxruntime (CPU) dengan
+    model hasil export ONNX + dynamic int8 quantization. Export hanya dilakukan
+    sekali (butuh `optimum` dan torch), setelah itu cukup onnxruntime + tokenizers.
+    """
+
+    def __init__(self, model_name="LazarusNLP/all-indo-e5-small-v4", cache_dir=None, num_threads=None, batch_size=32):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "onnx_models",
+            model_name.replace("/", "__"),
+        )
+        self.model_path = os.path.join(self.cache_dir, "model_quantized.onnx")
+
+        # cache hanya dianggap lengkap kalau model, tokenizer, dan konfigurasi pooling ada semua
+        required = [self.model_path] + [os.path.join(self.cache_dir, f) for f in ("tokenizer.json", "pooling_config.json")]
+        if not all(os.path.exists(path) for path in required):
+            self._export_and_quantize()
+
+        with open(os.path.join(self.cache_dir, "pooling_config.json"), "r", encoding="utf-8") as f:
+            self.pooling_config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.cache_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.pooling_config["max_seq_length"])
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        # default setengah core, sisanya untuk Ollama dan threadpool FastAPI
+        options.intra_op_num_threads = num_threads or max(1, (os.cpu_count() or 2) // 2)
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _export_and_quantize(self):
+        from huggingface_hub import hf_hub_download
+        from huggingface_hub.utils import EntryNotFoundError
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+
+        print(f"Export {self.model_name} ke ONNX + int8 di {self.cache_dir} ...")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        ORTModelForFeatureExtraction.from_pretrained(self.model_name, export=True).save_pretrained(self.cache_dir)
+        AutoTokenizer.from_pretrained(self.model_name).save_pretrained(self.cache_dir)
+
+        # samakan pooling / normalisasi dengan konfigurasi sentence-transformers model
+        def _read_json(filename, default):
+            try:
+                with open(hf_hub_download(self.model_name, filename), "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except EntryNotFoundError:
+                return default
+
+        modules = _read_json("modules.json", [])
+        pooling = _read_json("1_Pooling/config.json", {})
+        st_config = _read_json("sentence_bert_config.json", {})
+        pooling_config = {
+            "mode": "cls" if pooling.get("pooling_mode_cls_token") else "mean",
+            "normalize": any(m.get("type", "").endswith("Normalize") for m in modules),
+            "max_seq_length": st_config.get("max_seq_length", 512),
+        }
+        with open(os.path.join(self.cache_dir, "pooling_config.json"), "w", encoding="utf-8") as f:
+            json.dump(pooling_config, f, indent=2)
+
+        # model terkuantisasi ditulis paling akhir (lewat file sementara) supaya
+        # export yang terhenti di tengah tidak meninggalkan cache setengah jadi
+        tmp_path = f"{self.model_path}.tmp"
+        quantize_dynamic(
+            os.path.join(self.cache_dir, "model.onnx"),
+            tmp_path,
+            weight_type=QuantType.QInt8,
+        )
+        os.replace(tmp_path, self.model_path)
+
+    def _embed_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+        hidden = self.session.run(None, inputs)[0]
+
+        if self.pooling_config["mode"] == "cls":
+            vectors = hidden[:, 0]
+        else:
+            mask = attention_mask[..., None].astype(hidden.dtype)
+            vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.pooling_config["normalize"]:
+            vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        texts = [t.replace("\n", " ") for t in texts]
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed_batch(texts[i:i + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
@@ -3,11 +3,34 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.chains import create_history_aware_retriever, create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.runnables.history import RunnableWithMessageHistory
+from langchain_core.output_parsers import StrOutputParser
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+
+# opsi OllamaLLM, nilai None tidak dikirim sehingga memakai default server Ollama
+DEFAULT_OLLAMA_OPTIONS = {
+    "num_ctx": 4096,
+    # model tetap di memori selama periode sepi, tidak di-unload setelah 5 menit
+    "keep_alive": "30m",
+    "num_thread": None,
+}
+
+# context_in_system: {context} di system prompt (layout lama)
+# prefix_cache: system prompt statis + riwayat jadi prefix yang stabil, konteks di pesan terakhir
+PROMPT_LAYOUTS = ("context_in_system", "prefix_cache")
 
 class SimpleRAGChain:
-    def __init__(self, retriever, model_name="qwen2.5:3b"):
+    def __init__(self, retriever, model_name="qwen2.5:3b", pipelined=False, overlap_threshold=Fraction(2, 3),
+                 ollama_options=None, prompt_layout="context_in_system"):
+        if prompt_layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"Unsupported prompt layout {prompt_layout}")
         self.retriever = retriever
         self.model_name = model_name
+        self.ollama_options = {**DEFAULT_OLLAMA_OPTIONS, **(ollama_options or {})}
+        self.prompt_layout = prompt_layout
+        # pipelined: retrieval untuk pertanyaan asli jalan paralel dengan pembuatan pertanyaan mandiri
+        self.pipelined = pipelined
+        self.overlap_threshold = overlap_threshold
         self.llm = self._get_ollama_model(model_name)
         self.chain = self._setup_chain()
         print("RAG Chain setup success!")
@@ -15,7 +38,8 @@ class SimpleRAGChain:
     def _get_ollama_model(self, model_name):
         try:
             print(f"Connecting to Ollama model: {model_name} ...")
-            llm = OllamaLLM(model=model_name)
+            options = {key: value for key, value in self.ollama_options.items() if value is not None}
+            llm = OllamaLLM(model=model_name, **options)
             print("Ollama connected!")
             return llm
         except Exception as e:
@@ -40,27 +64,105 @@ class SimpleRAGChain:
             ]
         )
         history_aware_retriever = create_history_aware_retriever(self.llm, self.retriever, contextualize_question_prompt)
+        self.condense_chain = contextualize_question_prompt | self.llm | StrOutputParser()
+
+        question_answer_prompt = self._question_answer_prompt()
+        question_answer_chain = create_stuff_documents_chain(self.llm, question_answer_prompt)
+        self.question_answer_chain = question_answer_chain
+
+        rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
 
+        return rag_chain
+
+    def _question_answer_prompt(self):
         system_prompt = (
             "Kamu adalah asisten pintar yang hanya menjawab berdasarkan konteks yang diberikan."
             "Gunakan informasi berikut untuk menjawab pertanyaan."
             "Jika tidak ada informasi yang relevan, cukup jawab dengan 'Saya tidak tahu, anda bisa menghubungi bagian terkait untuk masalah tersebut.'"
-            "{context}"
         )
-        question_answer_prompt = ChatPromptTemplate.from_messages(
+
+        if self.prompt_layout == "prefix_cache":
+            # konteks hasil retrieval berubah tiap giliran, jadi ditaruh paling akhir
+            # supaya KV/prefix cache server bisa memakai ulang system prompt dan riwayat
+            return ChatPromptTemplate.from_messages(
+                [
+                    ("system", system_prompt),
+                    MessagesPlaceholder(variable_name="chat_history"),
+                    ("human", "Konteks:\n{context}\n\nPertanyaan: {input}"),
+                ]
+            )
+
+        return ChatPromptTemplate.from_messages(
             [
-                ("system", system_prompt),
+                ("system", system_prompt + "{context}"),
                 MessagesPlaceholder(variable_name="chat_history"),
                 ("human", "{input}"),
             ]
         )
-        question_answer_chain = create_stuff_documents_chain(self.llm, question_answer_prompt)
 
-        rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
+    @staticmethod
+    def _doc_key(doc):
+        return (doc.metadata.get("source"), doc.metadata.get("chunk_number"), doc.page_content)
 
-        return rag_chain
+    @staticmethod
+    def _normalize_question(text: str) -> str:
+        return " ".join(text.lower().split()).strip(" ?.!")
+
+    def _speculative_retrieve(self, question: str, messages):
+        """
+        Retrieval dengan pertanyaan asli dimulai bersamaan dengan pemanggilan LLM
+        untuk membuat pertanyaan mandiri. Hasil spekulatif dipakai kalau pertanyaan
+        hasil rewrite sama atau hasil top-k-nya cukup overlap, selain itu kedua
+        kandidat digabung.
+        """
+        if not messages:
+            return self.retriever.invoke(question)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            speculative_future = executor.submit(self.retriever.invoke, question)
+            condense_future = executor.submit(
+                self.condense_chain.invoke, {"input": question, "chat_history": messages}
+            )
+            rewritten = condense_future.result().strip()
+            speculative_docs = speculative_future.result()
+
+        if not rewritten or self._normalize_question(rewritten) == self._normalize_question(question):
+            return speculative_docs
+
+        rewritten_docs = self.retriever.invoke(rewritten)
+        speculative_keys = {self._doc_key(doc) for doc in speculative_docs}
+        rewritten_keys = [self._doc_key(doc) for doc in rewritten_docs]
+        # Fraction supaya 2 dari 3 hit tepat sama dengan ambang 2/3 (tanpa pembulatan float)
+        matches = sum(key in speculative_keys for key in rewritten_keys)
+        if Fraction(matches, max(len(rewritten_keys), 1)) >= self.overlap_threshold:
+            return speculative_docs
+
+        merged, seen = [], set()
+        for doc in rewritten_docs + speculative_docs:
+            key = self._doc_key(doc)
+            if key not in seen:
+                seen.add(key)
+                merged.append(doc)
+        return merged
+
+    def _ask_pipelined(self, question: str, chat_history) -> str:
+        messages = list(chat_history.messages)
+        docs = self._speculative_retrieve(question, messages)
+
+        answer = ""
+        for chunk in self.question_answer_chain.stream(
+            {"input": question, "chat_history": messages, "context": docs}
+        ):
+            answer += chunk
+
+        chat_history.add_user_message(question)
+        chat_history.add_ai_message(answer)
+        return answer
 
     def ask(self, question: str, chat_history, session_id) -> str:
+        if self.pipelined:
+            return self._ask_pipelined(question, chat_history)
+
         conversational_rag_chain = RunnableWithMessageHistory(
             self.chain,
             lambda _: chat_history,
@@ -11,6 +11,8 @@ class ChatSession(Base):
     session_id = Column(String, primary_key=True, index=True)
     topic = Column(String)
     messages = Column(JSON)
+    # naik setiap kali messages ditulis; tiap pesan menyimpan "version" saat ia ditulis
+    version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # new: owner of the session (user id)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -11,6 +11,15 @@ class Message(BaseModel):
 class SessionHistory(BaseModel):
     session_id: str
     topic: Optional[str]
+    # seq = versi sesi (naik setiap penulisan), start = index pesan pertama di `messages`
+    seq: int = 0
+    start: int = 0
+    messages: List[Message]
+
+class ChatTurnResponse(BaseModel):
+    session_id: str
+    seq: int
+    start: int
     messages: List[Message]
 
 class SessionSummary(BaseModel):
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# modul backend di-import sebagai `helpers.*`, sama seperti saat menjalankan uvicorn dari backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,123 @@
+import os
+import tempfile
+
+# database sqlite sementara dan tanpa warmup model, harus di-set sebelum import fast_api
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ["RAG_WARMUP"] = ""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import fast_api
+
+
+class FakeRAGChain:
+    def ask(self, question, chat_history, session_id):
+        return f"jawaban untuk {question}"
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    monkeypatch.setattr(fast_api, "create_rag_chain", lambda db_session: FakeRAGChain())
+    with TestClient(fast_api.app) as client:
+        username = f"user-{os.urandom(4).hex()}"
+        client.post("/register", json={"username": username, "password": "rahasia"})
+        token = client.post("/token", data={"username": username, "password": "rahasia"}).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        yield client
+
+
+def create_session(client):
+    return client.post("/session", json={"topic": "uji"}).json()["session_id"]
+
+
+def test_chat_returns_only_new_turn(client):
+    session_id = create_session(client)
+    first = client.post(f"/chat/{session_id}", json={"user_input": "q1"}).json()
+    second = client.post(f"/chat/{session_id}", json={"user_input": "q2"}).json()
+
+    assert first == {
+        "session_id": session_id,
+        "seq": 1,
+        "start": 0,
+        "messages": [
+            {"role": "user", "message": "q1"},
+            {"role": "assistant", "message": "jawaban untuk q1"},
+        ],
+    }
+    assert second["seq"] == 2
+    assert second["start"] == 2
+    assert [m["message"] for m in second["messages"]] == ["q2", "jawaban untuk q2"]
+
+
+def test_history_since_returns_delta(client):
+    session_id = create_session(client)
+    client.post(f"/chat/{session_id}", json={"user_input": "q1"})
+    client.post(f"/chat/{session_id}", json={"user_input": "q2"})
+
+    full = client.get(f"/history/{session_id}").json()
+    assert (full["seq"], full["start"], len(full["messages"])) == (2, 0, 4)
+
+    delta = client.get(f"/history/{session_id}", params={"since": 1}).json()
+    assert delta["start"] == 2
+    assert [m["message"] for m in delta["messages"]] == ["q2", "jawaban untuk q2"]
+
+    empty = client.get(f"/history/{session_id}", params={"since": 2}).json()
+    assert (empty["start"], empty["messages"]) == (4, [])
+
+    unknown = client.get(f"/history/{session_id}", params={"since": 99}).json()
+    assert (unknown["start"], len(unknown["messages"])) == (0, 4)
+
+
+def test_edit_last_bumps_seq_and_delta_sees_edit(client):
+    session_id = create_session(client)
+    client.post(f"/chat/{session_id}", json={"user_input": "q1"})
+    before = client.post(f"/chat/{session_id}", json={"user_input": "q2"}).json()
+
+    edited = client.post(f"/chat/{session_id}/edit_last", json={"user_input": "q2 baru"}).json()
+    assert edited["seq"] == before["seq"] + 1
+    assert edited["start"] == 2
+    assert [m["message"] for m in edited["messages"]] == ["q2 baru", "jawaban untuk q2 baru"]
+
+    delta = client.get(f"/history/{session_id}", params={"since": before["seq"]}).json()
+    assert delta["seq"] == edited["seq"]
+    assert delta["start"] == 2
+    assert [m["message"] for m in delta["messages"]] == ["q2 baru", "jawaban untuk q2 baru"]
+
+
+def test_history_etag_and_if_none_match(client):
+    session_id = create_session(client)
+    client.post(f"/chat/{session_id}", json={"user_input": "q1"})
+
+    res = client.get(f"/history/{session_id}")
+    etag = res.headers["ETag"]
+    assert client.get(f"/history/{session_id}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post(f"/chat/{session_id}/edit_last", json={"user_input": "q1 baru"})
+    res = client.get(f"/history/{session_id}", headers={"If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+
+def test_large_history_is_gzipped(client):
+    session_id = create_session(client)
+    for i in range(20):
+        client.post(f"/chat/{session_id}", json={"user_input": f"pertanyaan panjang nomor {i} " * 5})
+
+    res = client.get(f"/history/{session_id}", headers={"Accept-Encoding": "gzip"})
+    assert res.headers.get("content-encoding") == "gzip"
+
+
+def test_readyz_recovers_after_failed_warmup(client, monkeypatch):
+    monkeypatch.setitem(fast_api.startup_state, "warmup", "failed")
+    monkeypatch.setitem(fast_api.startup_state, "warmup_error", "ollama belum jalan")
+
+    components = {"embeddings": True, "vector_store": True, "llm": False}
+    monkeypatch.setattr(fast_api, "loaded_components", lambda: dict(components))
+    assert client.get("/readyz").status_code == 503
+
+    # request berikutnya berhasil membuat RAG chain
+    components["llm"] = True
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json()["warmup"] == "failed"
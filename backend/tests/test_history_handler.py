@@ -0,0 +1,179 @@
+import json
+import os
+
+from helpers.history_handler import HistoryHandler
+
+
+def read_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def contents(history):
+    return [m.content for m in history.messages]
+
+
+def test_save_appends_only_new_messages(tmp_path):
+    handler = HistoryHandler(str(tmp_path))
+    history = handler.get_session_history("s")
+    history.add_user_message("q1")
+    history.add_ai_message("a1")
+    handler.save_session_history("s")
+    history.add_user_message("q2")
+    handler.save_session_history("s")
+    handler.save_session_history("s")
+
+    assert read_lines(tmp_path / "s.jsonl") == [
+        {"role": "human", "content": "q1"},
+        {"role": "ai", "content": "a1"},
+        {"role": "human", "content": "q2"},
+    ]
+    assert contents(HistoryHandler(str(tmp_path)).get_session_history("s")) == ["q1", "a1", "q2"]
+
+
+def test_edit_writes_truncate_record(tmp_path):
+    handler = HistoryHandler(str(tmp_path))
+    history = handler.get_session_history("s")
+    history.add_user_message("q1")
+    history.add_ai_message("a1")
+    handler.save_session_history("s")
+
+    history.messages.pop()
+    history.add_ai_message("a1 baru")
+    handler.save_session_history("s")
+
+    assert read_lines(tmp_path / "s.jsonl")[2:] == [
+        {"op": "truncate", "length": 1},
+        {"role": "ai", "content": "a1 baru"},
+    ]
+    assert contents(HistoryHandler(str(tmp_path)).get_session_history("s")) == ["q1", "a1 baru"]
+
+
+def test_in_place_edit_is_persisted(tmp_path):
+    handler = HistoryHandler(str(tmp_path))
+    history = handler.get_session_history("s")
+    history.add_user_message("q1")
+    history.add_ai_message("a1")
+    handler.save_session_history("s")
+
+    history.messages[-1].content = "edited in place"
+    handler.save_session_history("s")
+
+    assert contents(HistoryHandler(str(tmp_path)).get_session_history("s")) == ["q1", "edited in place"]
+
+
+def test_shrinking_history_is_persisted(tmp_path):
+    handler = HistoryHandler(str(tmp_path))
+    history = handler.get_session_history("s")
+    history.add_user_message("q1")
+    history.add_ai_message("a1")
+    handler.save_session_history("s")
+
+    history.clear()
+    handler.save_session_history("s")
+
+    assert contents(HistoryHandler(str(tmp_path)).get_session_history("s")) == []
+
+
+def test_compaction_rewrites_log(tmp_path):
+    handler = HistoryHandler(str(tmp_path), compact_every=3)
+    history = handler.get_session_history("s")
+    history.add_user_message("q1")
+    handler.save_session_history("s")
+    for i in range(5):
+        history.messages[-1].content = f"q1 v{i}"
+        handler.save_session_history("s")
+
+    lines = read_lines(tmp_path / "s.jsonl")
+    assert len(lines) <= 1 + 2 * 3
+    assert contents(HistoryHandler(str(tmp_path)).get_session_history("s")) == ["q1 v4"]
+
+    # setelah compaction append tetap berjalan normal
+    history.add_ai_message("a1")
+    handler.save_session_history("s")
+    assert contents(HistoryHandler(str(tmp_path)).get_session_history("s")) == ["q1 v4", "a1"]
+
+
+def test_torn_last_line_is_truncated_before_append(tmp_path):
+    log_file = tmp_path / "s.jsonl"
+    log_file.write_text('{"role": "human", "content": "x"}\n{"role":"ai","con', encoding="utf-8")
+
+    handler = HistoryHandler(str(tmp_path))
+    history = handler.get_session_history("s")
+    assert contents(history) == ["x"]
+
+    history.add_ai_message("y")
+    handler.save_session_history("s")
+
+    assert read_lines(log_file) == [
+        {"role": "human", "content": "x"},
+        {"role": "ai", "content": "y"},
+    ]
+    assert contents(HistoryHandler(str(tmp_path)).get_session_history("s")) == ["x", "y"]
+
+
+def test_corrupt_middle_line_is_skipped_and_later_records_kept(tmp_path):
+    log_file = tmp_path / "s.jsonl"
+    original = '{"role": "human", "content": "x"}\n{"role":"ai\n{"role": "ai", "content": "y"}\n'
+    log_file.write_text(original, encoding="utf-8")
+
+    handler = HistoryHandler(str(tmp_path))
+    history = handler.get_session_history("s")
+    assert contents(history) == ["x", "y"]
+    assert log_file.read_text(encoding="utf-8") == original
+
+    history.add_user_message("z")
+    handler.save_session_history("s")
+    assert contents(HistoryHandler(str(tmp_path)).get_session_history("s")) == ["x", "y", "z"]
+
+
+def test_valid_last_line_without_newline_is_kept(tmp_path):
+    log_file = tmp_path / "s.jsonl"
+    log_file.write_text('{"role": "human", "content": "x"}', encoding="utf-8")
+
+    handler = HistoryHandler(str(tmp_path))
+    history = handler.get_session_history("s")
+    history.add_ai_message("y")
+    handler.save_session_history("s")
+
+    assert contents(HistoryHandler(str(tmp_path)).get_session_history("s")) == ["x", "y"]
+
+
+def test_lru_eviction_saves_and_bounds_cache(tmp_path):
+    handler = HistoryHandler(str(tmp_path), max_sessions=2)
+    handler.get_session_history("a").add_user_message("qa")
+    handler.get_session_history("b")
+    handler.get_session_history("a")
+    handler.get_session_history("c")
+
+    assert list(handler.store) == ["a", "c"]
+    handler.get_session_history("d")
+    assert list(handler.store) == ["c", "d"]
+    assert read_lines(tmp_path / "a.jsonl") == [{"role": "human", "content": "qa"}]
+
+
+def test_save_after_eviction_is_not_lost(tmp_path):
+    handler = HistoryHandler(str(tmp_path), max_sessions=1)
+    c = handler.get_session_history("c")
+    handler.get_session_history("d")
+    assert "c" not in handler.store
+
+    c.add_user_message("setelah evict")
+    handler.save_session_history("c")
+
+    assert read_lines(tmp_path / "c.jsonl") == [{"role": "human", "content": "setelah evict"}]
+    # objek yang sama dipakai lagi, bukan salinan dari disk
+    assert handler.get_session_history("c") is c
+
+
+def test_legacy_json_is_converted(tmp_path):
+    with open(tmp_path / "s.json", "w", encoding="utf-8") as f:
+        json.dump([{"role": "human", "content": "lama"}], f)
+
+    handler = HistoryHandler(str(tmp_path))
+    history = handler.get_session_history("s")
+    history.add_ai_message("baru")
+    handler.save_session_history("s")
+
+    assert not os.path.exists(tmp_path / "s.json")
+    assert contents(HistoryHandler(str(tmp_path)).get_session_history("s")) == ["lama", "baru"]
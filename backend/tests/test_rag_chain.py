@@ -0,0 +1,79 @@
+import inspect
+
+from langchain_core.documents import Document
+
+from helpers.rag_chain import SimpleRAGChain
+
+
+def doc(source, chunk=0):
+    return Document(page_content=f"{source}-{chunk}", metadata={"source": source, "chunk_number": chunk})
+
+
+class FakeRetriever:
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def invoke(self, query):
+        self.queries.append(query)
+        return list(self.results[query])
+
+
+class FakeCondenseChain:
+    def __init__(self, rewritten):
+        self.rewritten = rewritten
+        self.calls = 0
+
+    def invoke(self, inputs):
+        self.calls += 1
+        return self.rewritten
+
+
+def make_chain(results, rewritten):
+    # tanpa __init__ supaya tidak perlu Ollama
+    chain = SimpleRAGChain.__new__(SimpleRAGChain)
+    chain.retriever = FakeRetriever(results)
+    chain.condense_chain = FakeCondenseChain(rewritten)
+    chain.overlap_threshold = inspect.signature(SimpleRAGChain).parameters["overlap_threshold"].default
+    return chain
+
+
+def test_no_history_uses_raw_question_only():
+    chain = make_chain({"q": [doc("a"), doc("b")]}, rewritten="tidak dipakai")
+
+    assert chain._speculative_retrieve("q", []) == [doc("a"), doc("b")]
+    assert chain.retriever.queries == ["q"]
+    assert chain.condense_chain.calls == 0
+
+
+def test_equal_rewrite_keeps_speculative_result():
+    chain = make_chain({"Jadwal ujian?": [doc("a")]}, rewritten="  jadwal   UJIAN ")
+
+    assert chain._speculative_retrieve("Jadwal ujian?", ["riwayat"]) == [doc("a")]
+    assert chain.retriever.queries == ["Jadwal ujian?"]
+
+
+def test_two_of_three_overlap_keeps_speculative_result():
+    chain = make_chain(
+        {
+            "q": [doc("a"), doc("b"), doc("c")],
+            "rewrite": [doc("b"), doc("a"), doc("d")],
+        },
+        rewritten="rewrite",
+    )
+
+    assert chain._speculative_retrieve("q", ["riwayat"]) == [doc("a"), doc("b"), doc("c")]
+    assert chain.retriever.queries == ["q", "rewrite"]
+
+
+def test_low_overlap_merges_rewrite_first_without_duplicates():
+    chain = make_chain(
+        {
+            "q": [doc("a"), doc("b"), doc("c")],
+            "rewrite": [doc("d"), doc("a"), doc("e")],
+        },
+        rewritten="rewrite",
+    )
+
+    merged = chain._speculative_retrieve("q", ["riwayat"])
+    assert [d.page_content for d in merged] == ["d-0", "a-0", "e-0", "b-0", "c-0"]
@@ -0,0 +1,12 @@
+import check_startup
+
+
+def test_fast_api_import_stays_light(monkeypatch, tmp_path):
+    # subprocess mewarisi environment; sqlite supaya tidak butuh psycopg2 / Postgres
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'startup.db'}")
+
+    timings, heavy_loaded = check_startup.profile_import()
+
+    assert heavy_loaded == []
+    assert timings
+    assert check_startup.total_seconds(timings) < check_startup.MAX_IMPORT_SECONDS
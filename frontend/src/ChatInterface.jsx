@@ -16,12 +16,17 @@ export default function ChatInterface({ onAuthFailed }) {
   const [backupMessages, setBackupMessages] = useState([]);
 
   const messagesRef = useRef(null);
+  // seq = versi sesi terakhir yang sudah diterima dari backend
+  const seqRef = useRef(0);
 
   useEffect(() => {
     if (!id) return;
 
     api.getHistory(id)
-      .then((res) => setMessages(res.data.messages || []))
+      .then((res) => {
+        seqRef.current = res.data.seq;
+        setMessages(res.data.messages || []);
+      })
       .catch((err) => {
         if (err?.response?.status === 401 && onAuthFailed) {
           onAuthFailed();
@@ -92,9 +97,28 @@ const handleSend = async (e) => {
       res = await api.sendMessage(id, userText);
     }
 
-    setMessages(res.data.messages || []);
+    // backend hanya mengirim giliran baru, mulai dari index `start`
+    const base = nextMessages.filter((m) => !m._thinking);
+    seqRef.current = res.data.seq;
+    setMessages([...base.slice(0, res.data.start), ...(res.data.messages || [])]);
   } catch (err) {
     console.error(err);
+
+    // request bisa gagal di sisi client padahal sudah tersimpan di backend:
+    // ambil perubahan sejak seq terakhir dan sambungkan ke riwayat yang sudah dikonfirmasi
+    const confirmed = editingIndex !== null ? backupMessages : messages;
+    try {
+      const sync = await api.getHistory(id, seqRef.current);
+      if (sync.data.seq !== seqRef.current) {
+        seqRef.current = sync.data.seq;
+        setEditingIndex(null);
+        setMessages([...confirmed.slice(0, sync.data.start), ...(sync.data.messages || [])]);
+        return;
+      }
+    } catch (syncErr) {
+      console.error(syncErr);
+    }
+
     setMessages((prev) =>
       prev.map((m) =>
         m._thinking
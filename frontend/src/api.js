@@ -53,8 +53,10 @@ export const api = {
     return res.data;
   },
 
-getHistory: async (sessionId) => {
-  const res = await client.get(`/history/${sessionId}`);
+getHistory: async (sessionId, since) => {
+  const res = await client.get(`/history/${sessionId}`, {
+    params: since !== undefined ? { since } : {},
+  });
   console.log("[api] getHistory res:", res);
   return res;
 },